@@ -3,18 +3,28 @@ from __future__ import annotations
 
 import logging
 import asyncio
+from array import array
 from typing import Any
-from collections import deque
-from dataclasses import dataclass
-from time import time
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from functools import cached_property
+from time import monotonic, time
+
+import aiohttp
+import orjson
 
 from homeassistant.components import assist_pipeline, conversation
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    statistics_during_period,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_HOST, CONF_PORT
-from homeassistant.const import TIMEOUT_BACKOFF
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.const import CONF_HOST, CONF_PORT, UnitOfTime
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers import device_registry as dr, intent
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.util import dt as dt_util
 from homeassistant.helpers.storage import Store
 from homeassistant.helpers.typing import ConfigType
@@ -24,20 +34,86 @@ from .const import CONF_SYSTEM_PROMPT, DEFAULT_MODEL
 
 from .const import (
     DOMAIN,
+    JSON_HEADERS,
     MAX_CONVERSATION_HISTORY,
-    HISTORY_PRUNING_THRESHOLD,
     MAX_CONCURRENT_REQUESTS,
+    REQUEST_TIMEOUT,
+    SAVE_DELAY,
 )
-from .tools import WeatherTool, StockTool, WebSearchTool
+from .tools import BaseTool, WeatherTool, StockTool, WebSearchTool
 
 _LOGGER = logging.getLogger(__name__)
 
-@dataclass
-class ConversationHistoryItem:
-    """Class to hold conversation history items."""
-    text: str
-    timestamp: float
-    conversation_id: str
+# Responses stream, so bound the silence between reads rather than the total
+_REQUEST_TIMEOUT = aiohttp.ClientTimeout(
+    total=None, sock_connect=5, sock_read=REQUEST_TIMEOUT
+)
+_TOOL_FACTORIES = (WeatherTool, StockTool, WebSearchTool)
+_SUPPORTED_LANGUAGES: list[str] = ["*"]
+
+class RingHistory:
+    """Fixed-capacity conversation history kept in parallel arrays.
+
+    Once full, each append overwrites the oldest entry in place.
+    """
+
+    __slots__ = ("texts", "ts", "i", "n", "cap")
+
+    def __init__(self, cap: int = MAX_CONVERSATION_HISTORY) -> None:
+        """Initialize an empty history."""
+        self.cap = cap
+        self.texts: list[str] = [""] * cap
+        self.ts = array("d", bytes(8 * cap))
+        self.i = 0
+        self.n = 0
+
+    def __len__(self) -> int:
+        """Return the number of stored entries."""
+        return self.n
+
+    def append(self, text: str, timestamp: float) -> None:
+        """Add an entry, overwriting the oldest one when full."""
+        slot = self.i % self.cap
+        self.texts[slot] = text
+        self.ts[slot] = timestamp
+        self.i += 1
+        if self.n < self.cap:
+            self.n += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the history in its storage format.
+
+        Only filled slots are emitted, so short conversations stay small.
+        """
+        return {
+            "texts": self.texts[:self.n],
+            "ts": self.ts[:self.n].tolist(),
+            "i": self.i,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | list[dict[str, Any]]) -> RingHistory:
+        """Rebuild a history from its storage format."""
+        history = cls()
+        if isinstance(data, list):
+            # Stored by versions that kept one dict per message
+            for item in data[-history.cap:]:
+                history.append(item["text"], item["timestamp"])
+            return history
+
+        texts, ts = data["texts"], data["ts"]
+        if len(texts) != history.cap:
+            # Capacity changed since the data was written; replay in order
+            start = max(0, data["i"] - len(texts))
+            for j in range(start, data["i"]):
+                history.append(texts[j % len(texts)], ts[j % len(texts)])
+            return history
+
+        history.texts = list(texts)
+        history.ts = array("d", ts)
+        history.i = data["i"]
+        history.n = min(history.i, history.cap)
+        return history
 
 class OllamaAgent(conversation.ConversationEntity, conversation.AbstractConversationAgent):
     """Class to handle Ollama conversation processing."""
@@ -58,61 +134,121 @@ class OllamaAgent(conversation.ConversationEntity, conversation.AbstractConversa
         
         self.hass = hass
         self.entry = entry
-        self._conversation_history = {}
-        self._request_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self._conversation_history: dict[str, RingHistory] = {}
+        self._history_count = 0
+        self._dirty: set[str] = set()
+        self._saved_data: dict[str, dict[str, Any]] = {}
+        self._cond = asyncio.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._cmax = MAX_CONCURRENT_REQUESTS
+        self._empty_rejects = 0
         self._store = Store(hass, 1, f"{DOMAIN}.conversations")
         
+        # Store connection info, read from the entry once
+        self._host = entry.data[CONF_HOST]
+        self._port = entry.data[CONF_PORT]
+        self._model = entry.data.get("model", DEFAULT_MODEL)
+        self._system_prompt = entry.data.get(CONF_SYSTEM_PROMPT)
+        self._generate_url = f"http://{self._host}:{self._port}/api/generate"
+
         # Set up device info
         self._attr_unique_id = entry.entry_id
         self._attr_device_info = dr.DeviceInfo(
             identifiers={(DOMAIN, entry.entry_id)},
             name=entry.title,
             manufacturer="Ollama",
-            model=entry.data.get("model", "llama2"),
+            model=self._model,
             entry_type=dr.DeviceEntryType.SERVICE,
         )
 
-        # Initialize tools
-        self.tools = [
-            WeatherTool(hass),
-            StockTool(hass),
-            WebSearchTool(hass)
-        ]
-
-        # Get the shared aiohttp session
-        self._session = async_get_clientsession(hass)
+        # Dedicated session that keeps connections to Ollama warm
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=MAX_CONCURRENT_REQUESTS,
+                limit_per_host=MAX_CONCURRENT_REQUESTS,
+                keepalive_timeout=60,
+                ttl_dns_cache=300,
+            )
+        )
 
-        # Store connection info
-        self._host = entry.data[CONF_HOST]
-        self._port = entry.data[CONF_PORT]
-        self._model = entry.data.get("model", DEFAULT_MODEL)
-        self._system_prompt = entry.data.get(CONF_SYSTEM_PROMPT)
+        # Request latency is recorded as an hourly external statistic
+        self._stat_meta = StatisticMetaData(
+            has_mean=True,
+            has_sum=False,
+            name=f"{entry.title} latency",
+            source=DOMAIN,
+            statistic_id=f"{DOMAIN}:latency_{entry.entry_id.lower()}",
+            unit_of_measurement=UnitOfTime.SECONDS,
+        )
+        self._stat_hour: datetime | None = None
+        self._stat_count = 0
+        self._stat_successes = 0
+        self._stat_total = 0.0
+        self._stat_min = 0.0
+        self._stat_max = 0.0
+        self._listeners: list[CALLBACK_TYPE] = []
+
+    @cached_property
+    def tools(self) -> list[BaseTool]:
+        """Return the agent's tools, building them on first use."""
+        tools = [factory(self.hass) for factory in _TOOL_FACTORIES]
+        for tool in tools:
+            tool.async_setup()
+        return tools
+
+    @cached_property
+    def _base_payload(self) -> dict[str, Any]:
+        """Return the request fields shared by every turn."""
+        # Tools are fixed for the entry, so the request skeleton is too
+        return {
+            "model": self._model,
+            "system": self._system_prompt or "",
+            "tools": [tool.to_dict() for tool in self.tools],
+            "stream": True,
+        }
 
-    def _prune_history(self, conversation_id: str) -> None:
-        """Prune conversation history if it exceeds threshold."""
-        if conversation_id not in self._conversation_history:
-            return
+    async def _acquire(self) -> None:
+        """Wait for a free request slot and take it."""
+        async with self._cond:
+            self._waiting += 1
+            try:
+                await self._cond.wait_for(lambda: self._active < self._cmax)
+            finally:
+                self._waiting -= 1
+            self._active += 1
+
+    async def _release(self) -> None:
+        """Give back a request slot."""
+        async with self._cond:
+            self._active -= 1
+            self._cond.notify(1)
+
+    @asynccontextmanager
+    async def _admission(self) -> AsyncIterator[None]:
+        """Hold a request slot for the duration of the block."""
+        await self._acquire()
+        try:
+            yield
+        finally:
+            await self._release()
 
-        history = self._conversation_history[conversation_id]
-        if len(history) > HISTORY_PRUNING_THRESHOLD:
-            # Keep only the most recent items
-            self._conversation_history[conversation_id] = deque(
-                list(history)[-MAX_CONVERSATION_HISTORY:],
-                maxlen=MAX_CONVERSATION_HISTORY
-            )
+    async def async_set_max_concurrency(self, limit: int) -> None:
+        """Change how many requests may run at once."""
+        async with self._cond:
+            self._cmax = max(1, limit)
+            self._cond.notify_all()
 
     def _add_to_history(self, conversation_id: str, text: str) -> None:
         """Add an item to conversation history."""
-        if conversation_id not in self._conversation_history:
-            self._conversation_history[conversation_id] = deque(maxlen=MAX_CONVERSATION_HISTORY)
-
-        history_item = ConversationHistoryItem(
-            text=text,
-            timestamp=time(),
-            conversation_id=conversation_id
-        )
-        self._conversation_history[conversation_id].append(history_item)
-        self._prune_history(conversation_id)
+        history = self._conversation_history.get(conversation_id)
+        if history is None:
+            history = self._conversation_history[conversation_id] = RingHistory()
+        if len(history) < history.cap:
+            self._history_count += 1
+        history.append(text, time())
+        self._dirty.add(conversation_id)
+        self._store.async_delay_save(self._build_save, SAVE_DELAY)
 
     async def async_added_to_hass(self) -> None:
         """When entity is added to Home Assistant."""
@@ -143,9 +279,21 @@ class OllamaAgent(conversation.ConversationEntity, conversation.AbstractConversa
             language=user_input.language,
         )
 
+        # Ignore empty input (e.g. STT misfires) without taking a request slot
+        if not user_input.text.strip():
+            self._empty_rejects += 1
+            intent_response.async_set_speech("")
+            return conversation.ConversationResult(
+                response=intent_response,
+                conversation_id=chat_log.conversation_id,
+                chat_log=chat_log,
+            )
+
+        start_time: float | None = None
+        response_text = ""
         try:
-            async with self._request_semaphore:
-                start_time = time()
+            async with self._admission():
+                start_time = monotonic()
                 
                 # Add user input to chat log
                 chat_log.async_add_content(
@@ -156,17 +304,14 @@ class OllamaAgent(conversation.ConversationEntity, conversation.AbstractConversa
                 self._add_to_history(user_input.conversation_id, user_input.text)
                 
                 # Process the input with tools
-                url = f"http://{self._host}:{self._port}/api/generate"
-                headers = {"Content-Type": "application/json"}
-                
-                payload = {
-                    "model": self._model,
-                    "prompt": user_input.text,
-                    "system": self._system_prompt if self._system_prompt else "",
-                    "tools": [tool.to_dict() for tool in self.tools]
-                }
-
-                async with self._session.post(url, json=payload, headers=headers, timeout=TIMEOUT_BACKOFF) as response:
+                payload = {**self._base_payload, "prompt": user_input.text}
+
+                async with self._session.post(
+                    self._generate_url,
+                    data=orjson.dumps(payload),
+                    headers=JSON_HEADERS,
+                    timeout=_REQUEST_TIMEOUT,
+                ) as response:
                     if response.status != 200:
                         if response.status == 429:
                             raise conversation.RateLimitError("Rate limited by Ollama")
@@ -174,21 +319,24 @@ class OllamaAgent(conversation.ConversationEntity, conversation.AbstractConversa
                             raise conversation.IntentHandleError("Authentication failed")
                         else:
                             raise conversation.IntentHandleError(
-                                f"API request failed with status {response.status}"
+                                f"API request failed with status {response.status}: "
+                                f"{await response.text()}"
                             )
-                    result = await response.json()
-                    response_text = result.get("response", "")
 
-                # Add response to chat log and history
+                    # Forward deltas to the chat log as they arrive
+                    chunks: list[str] = []
+                    async for _ in chat_log.async_add_delta_content_stream(
+                        self.entity_id, self._async_stream_deltas(response, chunks)
+                    ):
+                        pass
+                    response_text = "".join(chunks)
+
+                # Add response to history
                 if response_text:
-                    chat_log.async_add_content(
-                        conversation.AssistantContent(text=response_text)
-                    )
                     self._add_to_history(user_input.conversation_id, f"Assistant: {response_text}")
 
-                # Record statistics and trace
-                duration = time() - start_time
-                await self._record_statistics(duration, bool(response_text))
+                # Record trace
+                duration = monotonic() - start_time
                 chat_log.async_trace({"duration": duration, "success": bool(response_text)})
                 
                 # Set speech in intent response
@@ -227,45 +375,123 @@ class OllamaAgent(conversation.ConversationEntity, conversation.AbstractConversa
                 chat_log=chat_log,
                 error=True
             )
+        finally:
+            # Record every request that was sent, so failures count too
+            if start_time is not None:
+                self._record_statistics(monotonic() - start_time, bool(response_text))
+                self._async_notify_listeners()
+
+    async def _async_stream_deltas(
+        self, response: aiohttp.ClientResponse, chunks: list[str]
+    ) -> AsyncGenerator[dict[str, str]]:
+        """Yield assistant deltas from Ollama's NDJSON stream."""
+        yield {"role": "assistant"}
+        async for line in response.content:
+            if not line.strip():
+                continue
+            result = orjson.loads(line)
+            if "error" in result:
+                raise conversation.IntentHandleError(f"API error: {result['error']}")
+            if text := result.get("response"):
+                chunks.append(text)
+                yield {"content": text}
+            if result.get("done"):
+                break
+
+    @callback
+    def _record_statistics(self, duration: float, success: bool) -> None:
+        """Record request latency for the current hour."""
+        if "recorder" not in self.hass.config.components:
+            return
 
-    async def _record_statistics(self, duration: float, success: bool) -> None:
-        """Record request statistics."""
-        now = dt_util.utcnow()
-        
-        # Add statistics using HA's statistics system
-        self.hass.async_add_executor_job(
-            self.hass.statistics.async_add_external_statistics,
-            {
-                "domain": DOMAIN,
-                "start": now,
-                "mean": duration,
-                "state": 1.0 if success else 0.0,
-                "state_characteristic": "latency",
-            }
+        hour = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+        if hour != self._stat_hour:
+            self._stat_hour = hour
+            self._stat_count = 0
+            self._stat_successes = 0
+            self._stat_total = 0.0
+            self._stat_min = duration
+            self._stat_max = duration
+
+        self._stat_count += 1
+        self._stat_successes += success
+        self._stat_total += duration
+        self._stat_min = min(self._stat_min, duration)
+        self._stat_max = max(self._stat_max, duration)
+
+        # The recorder queues the write; rewriting the hour's row is an upsert
+        async_add_external_statistics(
+            self.hass,
+            self._stat_meta,
+            [
+                StatisticData(
+                    start=hour,
+                    mean=self._stat_total / self._stat_count,
+                    min=self._stat_min,
+                    max=self._stat_max,
+                    state=self._stat_successes / self._stat_count,
+                )
+            ],
         )
 
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Call update_callback after each processed request."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def _async_notify_listeners(self) -> None:
+        """Tell listeners that the agent's statistics changed."""
+        for update_callback in self._listeners:
+            update_callback()
+
+    async def async_close(self) -> None:
+        """Tear down the tools and close the connection to Ollama."""
+        # The entity is never added to a platform, so async_on_remove would
+        # not run; only tear down tools that were actually built
+        if "tools" in self.__dict__:
+            for tool in self.tools:
+                tool.async_teardown()
+        await self._session.close()
+
+    @callback
+    def _build_save(self) -> dict[str, dict[str, Any]]:
+        """Return the data to store, re-encoding only changed conversations."""
+        for conversation_id in self._dirty:
+            self._saved_data[conversation_id] = (
+                self._conversation_history[conversation_id].as_dict()
+            )
+        self._dirty.clear()
+        return self._saved_data
+
     async def async_save(self) -> None:
         """Save conversation history."""
-        data = {
-            conversation_id: list(history)
-            for conversation_id, history in self._conversation_history.items()
-        }
-        await self._store.async_save(data)
+        await self._store.async_save(self._build_save())
 
     async def async_load(self) -> None:
         """Load conversation history."""
         data = await self._store.async_load()
         if data:
+            self._saved_data = data
             self._conversation_history = {
-                conv_id: deque(history, maxlen=MAX_CONVERSATION_HISTORY)
+                conv_id: RingHistory.from_dict(history)
                 for conv_id, history in data.items()
             }
+            self._history_count = sum(
+                len(history) for history in self._conversation_history.values()
+            )
 
     @property
     def supported_languages(self) -> list[str]:
         """Return a list of supported languages."""
         # We support all languages as we use Home Assistant's translation system
-        return ["*"]
+        return _SUPPORTED_LANGUAGES
 
     @property
     def language(self) -> str:
@@ -274,21 +500,32 @@ class OllamaAgent(conversation.ConversationEntity, conversation.AbstractConversa
 
     async def get_diagnostics(self) -> dict[str, Any]:
         """Return diagnostics information for debugging."""
-        system_info = await self.hass.helpers.system_info.async_get_system_info()
-
-        # Get statistics from HA's statistics API
-        stats = await self.hass.statistics.async_get_statistics(
-            statistic_ids=[f"{DOMAIN}:latency"],
-            period="5minute",
-            units={"mean": "seconds", "state": "count"}
-        )
+        system_info = await async_get_system_info(self.hass)
+
+        # Get the last day of latency statistics from the recorder
+        stats = {}
+        if "recorder" in self.hass.config.components:
+            stats = await get_instance(self.hass).async_add_executor_job(
+                statistics_during_period,
+                self.hass,
+                dt_util.utcnow() - timedelta(days=1),
+                None,
+                {self._stat_meta["statistic_id"]},
+                "hour",
+                None,
+                {"mean", "min", "max", "state"},
+            )
 
         return {
             "system_info": system_info,
             "host": self._host,
             "port": self._port,
             "model": self._model,
-            "conversation_history_size": sum(len(h) for h in self._conversation_history.values()),
+            "conversation_history_size": self._history_count,
             "active_conversations": len(self._conversation_history),
+            "active_requests": self._active,
+            "queued_requests": self._waiting,
+            "max_concurrent_requests": self._cmax,
+            "empty_inputs_rejected": self._empty_rejects,
             "statistics": stats
         }
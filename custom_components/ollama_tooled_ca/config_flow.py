@@ -22,19 +22,17 @@ from .ollama_client import OllamaClient
 
 _LOGGER = logging.getLogger(__name__)
 
-async def validate_input(hass: HomeAssistant, data: Dict[str, Any]) -> Dict[str, Any]:
+async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect."""
-    client = OllamaClient(
+    async with OllamaClient(
         host=data[CONF_HOST],
         port=data[CONF_PORT],
         model=data.get("model", DEFAULT_MODEL),
         tools=[],
         language="en"
-    )
-
-    # Test connection and get available models
-    await client.test_connection()
-    models = await client.get_available_models()
+    ) as client:
+        # A fresh model listing also proves the connection works
+        models = await client.get_available_models(refresh=True)
 
     if not models:
         raise ValueError("No models available")
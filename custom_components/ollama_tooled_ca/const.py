@@ -1,4 +1,5 @@
 """Constants for Ollama Tooled Conversation Agent."""
+from types import MappingProxyType
 from typing import Final
 
 DOMAIN: Final = "ollama_tooled_ca"
@@ -10,10 +11,12 @@ DEFAULT_MODEL: Final = "llama2"
 CONF_SYSTEM_PROMPT: Final = "system_prompt"
 
 # Performance settings
+JSON_HEADERS: Final = MappingProxyType({"Content-Type": "application/json"})
 MAX_CONCURRENT_REQUESTS: Final = 5
-REQUEST_TIMEOUT: Final = 30
-HEALTH_CHECK_TIMEOUT: Final = 10
+# Longest silence allowed from /api/generate; Ollama sends no headers until
+# the model is loaded, so this must cover a cold load
+REQUEST_TIMEOUT: Final = 120
 
 # Conversation history
 MAX_CONVERSATION_HISTORY: Final = 100
-HISTORY_PRUNING_THRESHOLD: Final = 80
+SAVE_DELAY: Final = 30
@@ -6,16 +6,186 @@ See LICENSE file in root of repository
 """
 from __future__ import annotations
 
-import json
+import asyncio
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import asynccontextmanager
+import hashlib
 import logging
 from pathlib import Path
+import re
+import time
 from typing import Any, Protocol
 
 import aiohttp
 from aiohttp import ClientError
+import orjson
+
+from .const import JSON_HEADERS, REQUEST_TIMEOUT
 
 _LOGGER = logging.getLogger(__name__)
 
+_OLLAMA_TIMEOUT = aiohttp.ClientTimeout(total=120, sock_connect=5, sock_read=30)
+# Generations stream, so bound the silence between reads rather than the
+# total; sock_read also covers the wait for headers through a cold load
+_GENERATE_TIMEOUT = aiohttp.ClientTimeout(
+    total=None, sock_connect=5, sock_read=REQUEST_TIMEOUT
+)
+_TOOL_TIMEOUT = 10
+
+_PROMPTS_DIR = Path(__file__).parent / "prompts"
+
+_TOOL_MARKER = "Using tool:"
+
+# Matches the `Using tool: name(` that opens a tool call
+_TOOL_CALL_START_RE = re.compile(r"Using tool:[ \t]*([\w.]+)[ \t]*\(")
+# Characters that end a tool call key or a bare value
+_KEY_STOP_RE = re.compile(r"[:,)]")
+_VALUE_STOP_RE = re.compile(r"[,)]")
+
+_MODELS_CACHE_TTL = 86400
+_RESPONSE_CACHE_SIZE = 128
+_RESPONSE_CACHE_TTL = 300
+
+# Model lists keyed by (host, port) -> (fetched at, model names)
+_MODELS_CACHE: dict[tuple[str, int], tuple[float, list[str]]] = {}
+
+
+def _load_prompt_files() -> dict[str, dict]:
+    """Read the prompts file for every available language."""
+    prompts = {}
+    for path in _PROMPTS_DIR.glob("*.json"):
+        try:
+            prompts[path.stem] = orjson.loads(path.read_bytes())
+        except Exception as e:
+            _LOGGER.error("Failed to load prompts for %s: %s", path.stem, e)
+    return prompts
+
+
+# Read once at import so prompt lookups never touch the disk in the event loop
+_PROMPTS_BY_LANGUAGE = _load_prompt_files()
+
+
+def _find_closing_quote(
+    text: str, quote: str, pos: int, end: int
+) -> tuple[int, int] | None:
+    """Return the closing quote of a value and the `,` or `)` after it.
+
+    A quoted value ends at the first matching quote followed by `,` or `)`,
+    so apostrophes and parentheses inside it are kept.
+    """
+    close = pos - 1
+    while (close := text.find(quote, close + 1, end)) != -1:
+        after = close + 1
+        while after < end and text[after] in " \t":
+            after += 1
+        if after < end and text[after] in ",)":
+            return close, after
+    return None
+
+
+def _parse_tool_args(
+    text: str, pos: int
+) -> tuple[int, dict[str, str]] | None:
+    """Parse `key: value` tool arguments starting after the opening `(`.
+
+    Returns the index past the closing `)` and the arguments, or None if the
+    call is not complete on its line. The scan only moves forward, so
+    malformed output cannot make it backtrack.
+    """
+    end = text.find("\n", pos)
+    if end == -1:
+        end = len(text)
+
+    args: dict[str, str] = {}
+    while True:
+        match = _KEY_STOP_RE.search(text, pos, end)
+        if match is None:
+            return None
+        stop = match.start()
+        if match.group() != ":":
+            # `)` closes the call; `,` ends a segment without a key
+            pos = stop + 1
+            if match.group() == ")":
+                return pos, args
+            continue
+
+        key = text[pos:stop].strip()
+        pos = stop + 1
+        while pos < end and text[pos] in " \t":
+            pos += 1
+
+        if pos < end and text[pos] in "\"'":
+            quoted = _find_closing_quote(text, text[pos], pos + 1, end)
+            if quoted is None:
+                return None
+            close, stop = quoted
+            value = text[pos + 1:close]
+        else:
+            match = _VALUE_STOP_RE.search(text, pos, end)
+            if match is None:
+                return None
+            stop = match.start()
+            value = text[pos:stop]
+
+        if key:
+            args[key] = value.strip()
+        pos = stop + 1
+        if text[stop] == ")":
+            return pos, args
+
+
+def _iter_tool_calls(text: str) -> Iterator[tuple[str, dict[str, str], int]]:
+    """Yield each complete tool call's name, arguments and end index."""
+    pos = 0
+    while match := _TOOL_CALL_START_RE.search(text, pos):
+        parsed = _parse_tool_args(text, match.end())
+        if parsed is None:
+            pos = match.end()
+            continue
+        pos, args = parsed
+        yield match.group(1), args, pos
+
+
+class _ToolCallScanner:
+    """Collect tool calls from a response while it is still streaming.
+
+    A tool call never spans lines and cannot change once its
+    closing parenthesis has arrived, so only text that could still complete
+    a call is kept between feeds: an open `Using tool:` on the current line,
+    or a tail short enough to be the start of one.
+    """
+
+    __slots__ = ("_buf", "calls")
+
+    def __init__(self) -> None:
+        """Initialize an empty scanner."""
+        self._buf = ""
+        self.calls: list[tuple[str, dict[str, str]]] = []
+
+    def feed(self, text: str) -> None:
+        """Append streamed text and record any newly completed tool calls."""
+        buf = self._buf + text
+        pos = 0
+        # A call can only complete on the piece that brings its `)`
+        if ")" in text and _TOOL_MARKER in buf:
+            for tool_name, args, pos in _iter_tool_calls(buf):
+                self.calls.append((tool_name, args))
+
+        pos = max(pos, buf.rfind("\n") + 1)
+        start = buf.find(_TOOL_MARKER, pos)
+        if start == -1:
+            start = max(pos, len(buf) - len(_TOOL_MARKER) + 1)
+        self._buf = buf[start:]
+
+
+def _read_prompts(language: str) -> dict | None:
+    """Return the prompts for a language, falling back to English."""
+    prompts = _PROMPTS_BY_LANGUAGE.get(language)
+    if prompts is None:
+        prompts = _PROMPTS_BY_LANGUAGE.get("en")
+    return prompts
+
 class ConnectionError(Exception):
     """Error indicating connection issues."""
 
@@ -42,7 +212,8 @@ class OllamaClient:
         port: int, 
         model: str = "mistral",
         tools: list = None,
-        language: str = "en"
+        language: str = "en",
+        cache_responses: bool = False
     ) -> None:
         """Initialize the client.
 
@@ -52,34 +223,63 @@ class OllamaClient:
             model: Name of the default model to use (e.g. mistral, llama2)
             tools: List of tools available to the assistant
             language: Language code for prompts and responses
+            cache_responses: Reuse recent responses to identical prompts;
+                off by default since answers about device state go stale
         """
         self.host = host
         self.port = port
         self.model = model
-        self.tools = tools or []
+        self._tools: list[Tool] = []
+        self._tools_by_name: dict[str, Tool] = {}
         self._language = language
-        self.system_prompt = None
+        self._system_prompt: str | None = None
         self._base_url = f"http://{host}:{port}/api"
         self._prompts = None
         self._available = False
+        self._session: aiohttp.ClientSession | None = None
+        self._cached_system_prompt: str | None = None
+        self._system_prompt_hash = ""
+        self._followup_tail: str | None = None
+        self._tool_params_json: dict[str, str] = {}
+        self._cache_responses = cache_responses
+        self._resp_cache: OrderedDict[tuple[str, str, str], tuple[float, str]] = (
+            OrderedDict()
+        )
+        self.tools = tools or []
 
-    def load_prompts(self) -> dict:
-        """Load system prompts for current language."""
-        prompts_path = Path(__file__).parent / "prompts" / f"{self._language}.json"
-        default_path = Path(__file__).parent / "prompts/en.json"
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=_OLLAMA_TIMEOUT,
+                connector=aiohttp.TCPConnector(
+                    limit=32,
+                    limit_per_host=8,
+                    keepalive_timeout=75,
+                    ttl_dns_cache=300,
+                )
+            )
+        return self._session
 
-        try:
-            if prompts_path.exists():
-                with prompts_path.open() as f:
-                    return json.load(f)
-            
-            # Fall back to English if language-specific prompts don't exist
-            if default_path.exists():
-                with default_path.open() as f:
-                    return json.load(f)
+    async def close(self) -> None:
+        """Close the shared session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
-        except Exception as e:
-            _LOGGER.error("Failed to load prompts for %s: %s", self._language, e)
+    async def __aenter__(self) -> OllamaClient:
+        """Use the client as an async context manager."""
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Close the shared session on exit."""
+        await self.close()
+
+    def load_prompts(self) -> dict:
+        """Load system prompts for current language."""
+        prompts = _read_prompts(self._language)
+        if prompts is not None:
+            return prompts
 
         return {
             "default_prompts": {
@@ -111,57 +311,122 @@ class OllamaClient:
         if value != self._language:
             self._language = value
             self._prompts = self.load_prompts()
+            self._cached_system_prompt = None
+            self._followup_tail = None
 
-    async def test_connection(self) -> bool:
-        """Test the connection to Ollama."""
+    @property
+    def system_prompt(self) -> str | None:
+        """Get the custom system prompt."""
+        return self._system_prompt
+
+    @system_prompt.setter
+    def system_prompt(self, value: str | None) -> None:
+        """Set the custom system prompt and drop the cached prompt."""
+        self._system_prompt = value
+        self._cached_system_prompt = None
+
+    @property
+    def tools(self) -> list[Tool]:
+        """Get the tools offered to the model."""
+        return self._tools
+
+    @tools.setter
+    def tools(self, value: list[Tool]) -> None:
+        """Set the tools and drop everything derived from them."""
+        self._tools = list(value)
+        self._tools_by_name = {tool.name: tool for tool in self._tools}
+        self._tool_params_json.clear()
+        self._cached_system_prompt = None
+
+    @asynccontextmanager
+    async def _request(
+        self, method: str, path: str, **kwargs: Any
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Send a request to the Ollama API and track whether it is available."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self._base_url}/version") as response:
-                    if response.status != 200:
-                        self._available = False
-                        raise ConnectionError("Failed to connect to Ollama")
-                    self._available = True
-                    if not self._prompts:
-                        self._prompts = self.load_prompts()
-                    return True
+            async with self._get_session().request(
+                method, f"{self._base_url}/{path}", **kwargs
+            ) as response:
+                if response.status != 200:
+                    self._available = False
+                    raise ConnectionError(
+                        f"Ollama returned {response.status}: {await response.text()}"
+                    )
+                self._available = True
+                yield response
         except ClientError as err:
             self._available = False
-            raise ConnectionError(f"Failed to connect to Ollama: {err}") from err
+            raise ConnectionError(f"Failed to communicate with Ollama: {err}") from err
 
-    async def get_available_models(self) -> list[str]:
-        """Get list of available models from Ollama server."""
-        if not self._available:
-            await self.test_connection()
+    async def test_connection(self) -> bool:
+        """Test the connection to Ollama."""
+        async with self._request("GET", "version"):
+            if not self._prompts:
+                self._prompts = self.load_prompts()
+            return True
+
+    async def get_available_models(self, refresh: bool = False) -> list[str]:
+        """Get list of available models from Ollama server.
+
+        Results are cached per server for a day. If the server cannot be
+        reached, a stale cached list is returned instead of raising. With
+        refresh set, the server is always asked and failures always raise.
+        """
+        key = (self.host, self.port)
+        cached = None if refresh else _MODELS_CACHE.get(key)
+        if cached and time.monotonic() - cached[0] < _MODELS_CACHE_TTL:
+            return cached[1]
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self._base_url}/tags") as response:
-                    if response.status != 200:
-                        raise ConnectionError("Failed to connect to Ollama")
-                    data = await response.json()
-                    if not isinstance(data, dict) or "models" not in data:
-                        raise OllamaError("Invalid response from Ollama server")
-                    return [model["name"] for model in data["models"]]
-        except ClientError as err:
-            raise ConnectionError(f"Failed to get Ollama models: {err}") from err
+            async with self._request("GET", "tags") as response:
+                data = orjson.loads(await response.read())
+        except ConnectionError as err:
+            if cached:
+                _LOGGER.warning("Using cached Ollama models: %s", err)
+                return cached[1]
+            raise
+
+        if not isinstance(data, dict) or "models" not in data:
+            raise OllamaError("Invalid response from Ollama server")
+        models = [model["name"] for model in data["models"]]
+
+        _MODELS_CACHE[key] = (time.monotonic(), models)
+        return models
+
+    def _tool_params(self, tool: Tool) -> str:
+        """Return a tool's parameters as JSON, serialized once per tool."""
+        params = self._tool_params_json.get(tool.name)
+        if params is None:
+            params = orjson.dumps(tool.parameters, option=orjson.OPT_INDENT_2).decode()
+            self._tool_params_json[tool.name] = params
+        return params
 
     def _format_tool_description(self, tool: Tool) -> str:
         """Format a single tool's description with parameters."""
-        params = json.dumps(tool.parameters, indent=2)
+        params = self._tool_params(tool)
         return f"{tool.name}: {tool.description}\nParameters: {params}"
 
     def _create_system_prompt(self) -> str:
-        """Create the complete system prompt."""
+        """Return the complete system prompt, building it on first use."""
+        if self._cached_system_prompt is None:
+            self._cached_system_prompt = self._build_system_prompt()
+            self._system_prompt_hash = hashlib.blake2b(
+                self._cached_system_prompt.encode(), digest_size=16
+            ).hexdigest()
+        return self._cached_system_prompt
+
+    def _build_system_prompt(self) -> str:
+        """Build the complete system prompt."""
         if not self._prompts:
             self._prompts = self.load_prompts()
 
         if self.system_prompt is not None:
             if self.tools:
-                tool_descriptions = [
+                tool_descriptions = "\n".join(
                     self._format_tool_description(tool)
                     for tool in self.tools
-                ]
-                return f"{self.system_prompt}\n\nAvailable tools:\n{chr(10).join(tool_descriptions)}"
+                )
+                return f"{self.system_prompt}\n\nAvailable tools:\n{tool_descriptions}"
             return self.system_prompt
 
         default_prompts = self._prompts.get("default_prompts", {})
@@ -179,15 +444,16 @@ class OllamaClient:
                 name=tool.name,
                 description=tool.description
             )
-            params = json.dumps(tool.parameters, indent=2)
+            params = self._tool_params(tool)
             tool_descriptions.append(f"{desc}\n{params_format.format(params=params)}")
-        
+        tool_list = "\n".join(tool_descriptions)
+
         return f"""{default_prompts.get("with_tools")}
 
 {tool_config.get("intro")}
 
 {tool_config.get("tool_list_header")}
-{chr(10).join(tool_descriptions)}
+{tool_list}
 
 {tool_config.get("usage_instructions")}
 {tool_config.get("tool_response")}"""
@@ -195,61 +461,99 @@ class OllamaClient:
     async def generate_response(
         self, 
         prompt: str, 
-        model: str | None = None
+        model: str | None = None,
+        stream: bool = True,
+        no_cache: bool = False,
+        on_text: Callable[[str], None] | None = None
     ) -> str:
-        """Generate a response from Ollama."""
+        """Generate a response from Ollama.
+
+        With stream set, the reply is read chunk by chunk as Ollama produces
+        it; otherwise the server buffers the whole completion. on_text, if
+        given, receives each piece of text as it arrives. If the client caches
+        responses and no_cache is not set, replies to a repeated prompt are
+        served from a small in-memory cache for a few minutes.
+        """
+        model = model or self.model
+        system = self._create_system_prompt()
+        use_cache = self._cache_responses and not no_cache
+        key = (model, self._system_prompt_hash, prompt)
+
+        if use_cache:
+            cached = self._resp_cache.get(key)
+            if cached and time.monotonic() - cached[0] < _RESPONSE_CACHE_TTL:
+                self._resp_cache.move_to_end(key)
+                if on_text is not None:
+                    on_text(cached[1])
+                return cached[1]
+
+        text = await self._generate(prompt, model, system, stream, on_text)
+
+        if use_cache and text:
+            self._resp_cache[key] = (time.monotonic(), text)
+            self._resp_cache.move_to_end(key)
+            if len(self._resp_cache) > _RESPONSE_CACHE_SIZE:
+                self._resp_cache.popitem(last=False)
+
+        return text
+
+    async def _generate(
+        self,
+        prompt: str,
+        model: str,
+        system: str,
+        stream: bool,
+        on_text: Callable[[str], None] | None = None
+    ) -> str:
+        """Request a completion from the generate endpoint."""
         if not self._available:
             await self.test_connection()
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self._base_url}/generate",
-                    json={
-                        "model": model or self.model,
-                        "prompt": prompt,
-                        "system": self._create_system_prompt(),
-                        "stream": False
-                    }
-                ) as response:
-                    if response.status != 200:
-                        raise OllamaError(f"API error: {await response.text()}")
-                    
-                    result = await response.json()
-                    return result.get("response", "")
-        except ClientError as err:
-            raise ConnectionError(f"Failed to communicate with Ollama: {err}") from err
+            async with self._request(
+                "POST",
+                "generate",
+                data=orjson.dumps({
+                    "model": model,
+                    "prompt": prompt,
+                    "system": system,
+                    "stream": stream
+                }),
+                headers=JSON_HEADERS,
+                timeout=_GENERATE_TIMEOUT
+            ) as response:
+                if not stream:
+                    result = orjson.loads(await response.read())
+                    text = result.get("response", "")
+                    if on_text is not None:
+                        on_text(text)
+                    return text
+
+                chunks = []
+                async for line in response.content:
+                    if not line.strip():
+                        continue
+                    chunk = orjson.loads(line)
+                    if "error" in chunk:
+                        raise OllamaError(f"API error: {chunk['error']}")
+                    piece = chunk.get("response", "")
+                    chunks.append(piece)
+                    if on_text is not None and piece:
+                        on_text(piece)
+                    if chunk.get("done"):
+                        break
+                return "".join(chunks)
+        except (ConnectionError, OllamaError):
+            raise
         except Exception as err:
             raise OllamaError(f"Error generating response: {err}") from err
 
     def extract_tool_calls(self, response: str) -> list[tuple[str, dict[str, str]]]:
         """Extract tool calls from the response."""
-        if not self._prompts:
-            self._prompts = self.load_prompts()
-
-        tool_config = self._prompts.get("tool_configuration", {})
-        usage_pattern = tool_config.get("usage_instructions", "Using tool:")
-
-        tool_calls = []
-        for line in response.split("\n"):
-            if usage_pattern.split(":")[0] in line:
-                try:
-                    tool_part = line.split(":", 1)[1].strip()
-                    tool_name = tool_part[:tool_part.index("(")].strip()
-                    params_str = tool_part[tool_part.index("(")+1:tool_part.rindex(")")]
-                    
-                    params = {}
-                    for param in params_str.split(","):
-                        if ":" in param:
-                            key, value = param.split(":", 1)
-                            params[key.strip()] = value.strip().strip('"\'')
-                    
-                    tool_calls.append((tool_name, params))
-                except Exception as err:
-                    _LOGGER.error("Error parsing tool call: %s", err)
-                    continue
-        
-        return tool_calls
+        return [
+            (tool_name, args)
+            for tool_name, args, _ in _iter_tool_calls(response)
+        ]
 
     async def _execute_tool(self, tool_name: str, args: dict[str, str]) -> str:
         """Execute a single tool and format its result."""
@@ -257,7 +561,7 @@ class OllamaClient:
             self._prompts = self.load_prompts()
 
         formatting = self._prompts.get("formatting", {})
-        tool = next((t for t in self.tools if t.name == tool_name), None)
+        tool = self._tools_by_name.get(tool_name)
         if not tool:
             error_format = formatting.get(
                 "error_format", 
@@ -266,12 +570,19 @@ class OllamaClient:
             return error_format.format(error=f"{tool_name} not found")
             
         try:
-            result = await tool.execute(**args)
+            result = await asyncio.wait_for(tool.execute(**args), _TOOL_TIMEOUT)
             success_format = formatting.get(
                 "success_acknowledgment", 
                 "{tool_name} result: {result}"
             )
             return success_format.format(tool_name=tool_name, result=result)
+        except asyncio.TimeoutError:
+            _LOGGER.error("Tool %s timed out", tool_name)
+            error_format = formatting.get(
+                "error_format", 
+                "I encountered an error while trying to help: {error}"
+            )
+            return error_format.format(error=f"{tool_name} timed out")
         except Exception as err:
             _LOGGER.error("Tool execution error: %s", err)
             error_format = formatting.get(
@@ -280,33 +591,65 @@ class OllamaClient:
             )
             return error_format.format(error=str(err))
 
+    def _create_followup_prompt(self, text: str, tool_results: list[str]) -> str:
+        """Create the follow-up prompt carrying tool results."""
+        if self._followup_tail is None:
+            if not self._prompts:
+                self._prompts = self.load_prompts()
+            self._followup_tail = self._prompts.get("tool_configuration", {}).get(
+                "tool_response",
+                "Please provide a natural response incorporating these results."
+            )
+        results = "\n".join(tool_results)
+
+        return f"""Original request: {text}
+
+Tool results:
+{results}
+
+{self._followup_tail}"""
+
     async def process_with_tools(self, text: str) -> str:
         """Process text with tool support."""
         if not self._available:
             await self.test_connection()
 
-        response = await self.generate_response(text)
-        
-        tool_calls = self.extract_tool_calls(response)
-        if not tool_calls:
-            return response
-
-        tool_results = []
-        for tool_name, args in tool_calls:
-            result = await self._execute_tool(tool_name, args)
-            tool_results.append(result)
-
-        if not tool_results:
-            return response
+        scanner = _ToolCallScanner()
+        tasks: list[asyncio.Task[str]] = []
 
-        # Create follow-up prompt with tool results
-        tool_config = self._prompts.get("tool_configuration", {})
-        prompt = f"""Original request: {text}
+        def _start_tools(piece: str) -> None:
+            # Run each tool as soon as its call is complete, while the model
+            # is still producing the rest of the response
+            scanner.feed(piece)
+            for tool_name, args in scanner.calls[len(tasks):]:
+                tasks.append(asyncio.create_task(self._execute_tool(tool_name, args)))
 
-Tool results:
-{chr(10).join(tool_results)}
+        try:
+            response = await self.generate_response(text, on_text=_start_tools)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
 
-{tool_config.get("tool_response", "Please provide a natural response incorporating these results.")}"""
+        if not tasks:
+            return response
 
-        follow_up_response = await self.generate_response(prompt)
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        error_format = self._prompts.get("formatting", {}).get(
+            "error_format",
+            "I encountered an error while trying to help: {error}"
+        )
+        tool_results = [
+            error_format.format(error=str(result))
+            if isinstance(result, Exception)
+            else result
+            for result in results
+        ]
+
+        follow_up_response = await self.generate_response(
+            self._create_followup_prompt(text, tool_results),
+            stream=False,
+            no_cache=True
+        )
         return follow_up_response or response
@@ -12,7 +12,7 @@ from homeassistant.components.sensor import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import PERCENTAGE, UnitOfTime, UnitOfInformation
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import (
@@ -37,11 +37,18 @@ async def async_setup_entry(
         _LOGGER,
         name="ollama_sensors",
         update_method=_async_update_data(agent),
-        update_interval=timedelta(minutes=5),
+        # Updates are pushed by the agent; polling is only a safety net
+        update_interval=timedelta(hours=1),
     )
 
     await coordinator.async_config_entry_first_refresh()
 
+    @callback
+    def _async_push_update() -> None:
+        coordinator.async_set_updated_data(_collect_data(agent))
+
+    entry.async_on_unload(agent.async_add_listener(_async_push_update))
+
     entities = [
         CacheHitRateSensor(coordinator, entry),
         MemoryUsageSensor(coordinator, entry),
@@ -53,46 +60,55 @@ async def async_setup_entry(
 
     async_add_entities(entities)
 
-async def _async_update_data(agent):
+def _async_update_data(agent):
     """Fetch data for sensors."""
     async def _update():
-        data = {}
-        
-        # Get cache statistics
-        if hasattr(agent, 'cache_manager'):
-            cache_stats = agent.cache_manager.get_stats()
-            data['cache_hit_rate'] = sum(
-                stats.get('hit_rate', 0) 
-                for stats in cache_stats.values()
-            ) / len(cache_stats) if cache_stats else 0
-            data['memory_usage'] = sum(
-                stats.get('memory_usage_mb', 0) 
-                for stats in cache_stats.values()
-            )
-
-        # Get performance statistics
-        if hasattr(agent, 'stats_manager'):
-            perf_stats = agent.stats_manager.get_performance_summary()
-            if 'requests' in perf_stats:
-                data['avg_response_time'] = perf_stats['requests'].get('avg_duration', 0)
-                data['error_rate'] = 1 - perf_stats['requests'].get('success_rate', 1)
-                data['total_requests'] = perf_stats['requests'].get('total_requests', 0)
-
-        # Get connection pool statistics
-        if hasattr(agent, 'connection_pool'):
-            conn_stats = agent.connection_pool.get_stats()
-            data['connection_usage'] = sum(
-                stats.get('active_connections', 0) / stats.get('total_connections', 1) 
-                for stats in conn_stats.values()
-            ) / len(conn_stats) if conn_stats else 0
-
-        return data
+        return _collect_data(agent)
 
     return _update
 
+def _collect_data(agent) -> dict[str, Any]:
+    """Build the sensor data from the agent's statistics."""
+    data = {}
+    
+    # Get cache statistics
+    if hasattr(agent, 'cache_manager'):
+        count = 0
+        hit_rate = 0.0
+        memory = 0.0
+        for stats in agent.cache_manager.get_stats().values():
+            count += 1
+            hit_rate += stats.get('hit_rate', 0)
+            memory += stats.get('memory_usage_mb', 0)
+        data['cache_hit_rate'] = hit_rate / count if count else 0
+        data['memory_usage'] = memory
+
+    # Get performance statistics
+    if hasattr(agent, 'stats_manager'):
+        perf_stats = agent.stats_manager.get_performance_summary()
+        if 'requests' in perf_stats:
+            data['avg_response_time'] = perf_stats['requests'].get('avg_duration', 0)
+            data['error_rate'] = 1 - perf_stats['requests'].get('success_rate', 1)
+            data['total_requests'] = perf_stats['requests'].get('total_requests', 0)
+
+    # Get connection pool statistics
+    if hasattr(agent, 'connection_pool'):
+        count = 0
+        usage = 0.0
+        for stats in agent.connection_pool.get_stats().values():
+            count += 1
+            usage += stats.get('active_connections', 0) / stats.get('total_connections', 1)
+        data['connection_usage'] = usage / count if count else 0
+
+    return data
+
+
 class OllamaSensorBase(CoordinatorEntity, SensorEntity):
     """Base class for Ollama sensors."""
 
+    _key: str
+    _scale: float = 1
+
     def __init__(
         self,
         coordinator: DataUpdateCoordinator,
@@ -108,10 +124,23 @@ class OllamaSensorBase(CoordinatorEntity, SensorEntity):
             manufacturer="Ollama",
             model=entry.data.get("model", "Unknown"),
         )
+        self._update_native_value()
+
+    def _update_native_value(self) -> None:
+        """Copy this sensor's value out of the coordinator data."""
+        self._attr_native_value = self.coordinator.data.get(self._key, 0) * self._scale
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update the cached value when the coordinator has new data."""
+        self._update_native_value()
+        super()._handle_coordinator_update()
 
 class CacheHitRateSensor(OllamaSensorBase):
     """Sensor for cache hit rate."""
 
+    _key = "cache_hit_rate"
+    _scale = 100
     _attr_native_unit_of_measurement = PERCENTAGE
     _attr_state_class = SensorStateClass.MEASUREMENT
 
@@ -120,14 +149,10 @@ class CacheHitRateSensor(OllamaSensorBase):
         """Return the name of the sensor."""
         return "Cache Hit Rate"
 
-    @property
-    def native_value(self) -> float:
-        """Return the state of the sensor."""
-        return self.coordinator.data.get('cache_hit_rate', 0) * 100
-
 class MemoryUsageSensor(OllamaSensorBase):
     """Sensor for memory usage."""
 
+    _key = "memory_usage"
     _attr_device_class = SensorDeviceClass.DATA_SIZE
     _attr_native_unit_of_measurement = UnitOfInformation.MEGABYTES
     _attr_state_class = SensorStateClass.MEASUREMENT
@@ -137,14 +162,10 @@ class MemoryUsageSensor(OllamaSensorBase):
         """Return the name of the sensor."""
         return "Memory Usage"
 
-    @property
-    def native_value(self) -> float:
-        """Return the state of the sensor."""
-        return self.coordinator.data.get('memory_usage', 0)
-
 class ResponseTimeSensor(OllamaSensorBase):
     """Sensor for average response time."""
 
+    _key = "avg_response_time"
     _attr_device_class = SensorDeviceClass.DURATION
     _attr_native_unit_of_measurement = UnitOfTime.SECONDS
     _attr_state_class = SensorStateClass.MEASUREMENT
@@ -154,14 +175,11 @@ class ResponseTimeSensor(OllamaSensorBase):
         """Return the name of the sensor."""
         return "Average Response Time"
 
-    @property
-    def native_value(self) -> float:
-        """Return the state of the sensor."""
-        return self.coordinator.data.get('avg_response_time', 0)
-
 class ConnectionPoolSensor(OllamaSensorBase):
     """Sensor for connection pool usage."""
 
+    _key = "connection_usage"
+    _scale = 100
     _attr_native_unit_of_measurement = PERCENTAGE
     _attr_state_class = SensorStateClass.MEASUREMENT
 
@@ -170,14 +188,10 @@ class ConnectionPoolSensor(OllamaSensorBase):
         """Return the name of the sensor."""
         return "Connection Pool Usage"
 
-    @property
-    def native_value(self) -> float:
-        """Return the state of the sensor."""
-        return self.coordinator.data.get('connection_usage', 0) * 100
-
 class RequestsSensor(OllamaSensorBase):
     """Sensor for total requests."""
 
+    _key = "total_requests"
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
 
     @property
@@ -185,14 +199,11 @@ class RequestsSensor(OllamaSensorBase):
         """Return the name of the sensor."""
         return "Total Requests"
 
-    @property
-    def native_value(self) -> int:
-        """Return the state of the sensor."""
-        return self.coordinator.data.get('total_requests', 0)
-
 class ErrorRateSensor(OllamaSensorBase):
     """Sensor for error rate."""
 
+    _key = "error_rate"
+    _scale = 100
     _attr_native_unit_of_measurement = PERCENTAGE
     _attr_state_class = SensorStateClass.MEASUREMENT
 
@@ -200,8 +211,3 @@ class ErrorRateSensor(OllamaSensorBase):
     def name(self) -> str:
         """Return the name of the sensor."""
         return "Error Rate"
-
-    @property
-    def native_value(self) -> float:
-        """Return the state of the sensor."""
-        return self.coordinator.data.get('error_rate', 0) * 100
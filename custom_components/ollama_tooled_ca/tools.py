@@ -9,67 +9,105 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from typing import Any
 
-from homeassistant.components import weather
-from homeassistant.const import ATTR_TEMPERATURE
-from homeassistant.core import HomeAssistant, State
-from homeassistant.helpers import network
+from homeassistant.const import ATTR_TEMPERATURE, Platform
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.helpers.event import (
+    async_track_state_added_domain,
+    async_track_state_removed_domain,
+)
 
 class BaseTool(ABC):
     """Base class for tools."""
 
+    name: str
+    description: str
+    parameters: dict[str, Any]
+
     def __init__(self, hass: HomeAssistant) -> None:
         """Initialize the tool."""
         self.hass = hass
 
-    @property
-    @abstractmethod
-    def name(self) -> str:
-        """Return the name of the tool."""
-        pass
-
-    @property
-    @abstractmethod
-    def description(self) -> str:
-        """Return the description of the tool."""
-        pass
-
-    @property
-    @abstractmethod
-    def parameters(self) -> dict[str, Any]:
-        """Return the parameters schema."""
-        pass
+    def to_dict(self) -> dict[str, Any]:
+        """Return the tool definition in Ollama's function format."""
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": {
+                    "type": "object",
+                    "properties": self.parameters,
+                },
+            },
+        }
 
     @abstractmethod
     async def execute(self, **kwargs) -> Any:
         """Execute the tool with given parameters."""
         pass
 
-class WeatherTool(BaseTool):
-    """Tool to get weather information."""
+    @callback
+    def async_setup(self) -> None:
+        """Set up the tool when the agent first uses it."""
 
-    @property
-    def name(self) -> str:
-        """Return the name of the tool."""
-        return "get_weather"
+    @callback
+    def async_teardown(self) -> None:
+        """Release anything set up in async_setup."""
 
-    @property
-    def description(self) -> str:
-        """Return the description of the tool."""
-        return "Get current weather information from a weather entity"
+class WeatherTool(BaseTool):
+    """Tool to get weather information."""
 
-    @property
-    def parameters(self) -> dict[str, Any]:
-        """Return the parameters schema."""
-        return {
-            "entity_id": {
-                "type": "string",
-                "description": "The entity ID of the weather entity (e.g. weather.home)"
-            }
+    name = "get_weather"
+    description = "Get current weather information from a weather entity"
+    parameters = {
+        "entity_id": {
+            "type": "string",
+            "description": "The entity ID of the weather entity (e.g. weather.home)"
         }
+    }
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the tool."""
+        super().__init__(hass)
+        self._entity_id: str | None = None
+        self._unsubs: list[CALLBACK_TYPE] = []
+
+    @callback
+    def async_setup(self) -> None:
+        """Track the default weather entity."""
+        entity_ids = self.hass.states.async_entity_ids(Platform.WEATHER)
+        self._entity_id = entity_ids[0] if entity_ids else None
+        self._unsubs = [
+            async_track_state_added_domain(
+                self.hass, Platform.WEATHER, self._async_weather_added
+            ),
+            async_track_state_removed_domain(
+                self.hass, Platform.WEATHER, self._async_weather_removed
+            ),
+        ]
+
+    @callback
+    def async_teardown(self) -> None:
+        """Stop tracking weather entities."""
+        while self._unsubs:
+            self._unsubs.pop()()
+
+    @callback
+    def _async_weather_added(self, event: Event) -> None:
+        """Use the first weather entity that appears as the default."""
+        if self._entity_id is None:
+            self._entity_id = event.data["entity_id"]
+
+    @callback
+    def _async_weather_removed(self, event: Event) -> None:
+        """Pick a new default when the current weather entity goes away."""
+        if event.data["entity_id"] == self._entity_id:
+            entity_ids = self.hass.states.async_entity_ids(Platform.WEATHER)
+            self._entity_id = entity_ids[0] if entity_ids else None
 
     async def execute(self, **kwargs) -> str:
         """Execute the tool."""
-        entity_id = kwargs.get("entity_id")
+        entity_id = kwargs.get("entity_id") or self._entity_id
         if not entity_id:
             return "No weather entity specified"
 
@@ -92,25 +130,14 @@ class WeatherTool(BaseTool):
 class StockTool(BaseTool):
     """Tool to get stock information."""
 
-    @property
-    def name(self) -> str:
-        """Return the name of the tool."""
-        return "get_stock_price"
-
-    @property
-    def description(self) -> str:
-        """Return the description of the tool."""
-        return "Get current stock price from an existing stock sensor"
-
-    @property
-    def parameters(self) -> dict[str, Any]:
-        """Return the parameters schema."""
-        return {
-            "entity_id": {
-                "type": "string",
-                "description": "The entity ID of the stock sensor (e.g. sensor.stock_price)"
-            }
+    name = "get_stock_price"
+    description = "Get current stock price from an existing stock sensor"
+    parameters = {
+        "entity_id": {
+            "type": "string",
+            "description": "The entity ID of the stock sensor (e.g. sensor.stock_price)"
         }
+    }
 
     async def execute(self, **kwargs) -> str:
         """Execute the tool."""
@@ -130,30 +157,19 @@ class StockTool(BaseTool):
 class WebSearchTool(BaseTool):
     """Tool for web searches."""
 
-    @property
-    def name(self) -> str:
-        """Return the name of the tool."""
-        return "web_search"
-
-    @property
-    def description(self) -> str:
-        """Return the description of the tool."""
-        return "Search the web for information"
-
-    @property
-    def parameters(self) -> dict[str, Any]:
-        """Return the parameters schema."""
-        return {
-            "query": {
-                "type": "string",
-                "description": "The search query"
-            },
-            "num_results": {
-                "type": "integer",
-                "description": "Number of results to return (default: 3)",
-                "default": 3
-            }
+    name = "web_search"
+    description = "Search the web for information"
+    parameters = {
+        "query": {
+            "type": "string",
+            "description": "The search query"
+        },
+        "num_results": {
+            "type": "integer",
+            "description": "Number of results to return (default: 3)",
+            "default": 3
         }
+    }
 
     async def execute(self, **kwargs) -> str:
         """Execute the tool."""